@@ -15,9 +15,9 @@ Usage:
 
 import random
 from enum import IntEnum
-from typing import Optional, Union, Tuple, List, Callable, TypeVar, overload, Generic, Any, Sequence
-
-from .utils import list_like
+from io import StringIO
+from itertools import repeat
+from typing import Optional, Union, Tuple, List, Callable, TypeVar, overload, Generic, Any, Sequence, TextIO
 
 
 class RangeQueryRandomMode(IntEnum):
@@ -26,12 +26,170 @@ class RangeQueryRandomMode(IntEnum):
     ALLOW_EQUAL = 1  # allow l = r
 
 
+try:
+    # `random.randint(a, b)` is `a + _randbelow(b - a + 1)` on the shared
+    # instance, so calling it directly draws the very same numbers while
+    # skipping the argument checks of randint/randrange.
+    _randbelow = random._inst._randbelow  # pylint: disable=W0212
+except AttributeError:
+    _randbelow = random.randrange
+
+# Per-dimension (lo, hi, length, lower bound of big query length).
+_Bounds = List[Tuple[int, int, int, int]]
+
+
+def _random_endpoints(lo: int, cur_l: int, lb: int, num: int, less: bool,
+                      big_query: float) -> Tuple[List[int], List[int]]:
+    """
+    Draw `num` ranges inside [lo, lo + cur_l - 1] for a single dimension,
+    where `cur_l` and `lb` are the precomputed values from
+    `_canonicalize_ranges`.
+    Returns the left and right endpoints as two separate lists.
+    Everything used in the loop is a local name, so the loop body
+    does no global or attribute lookups.
+    """
+    randbelow = _randbelow
+    rand = random.random
+    # All the big/small decisions are drawn up front in one comprehension,
+    # so the loop below only reads a precomputed flag.
+    big_mask = [rand() < big_query for _ in range(num)]
+    col_l = [0] * num
+    col_r = [0] * num
+    for i, big in enumerate(big_mask):
+        if big:
+            ql = lb + randbelow(cur_l - lb + 1)
+            l = lo + randbelow(cur_l - ql + 1)
+            r = l + ql - 1
+        else:
+            l = lo + randbelow(cur_l)
+            if less:
+                # Pick r uniformly among the other positions.
+                r = lo + randbelow(cur_l - 1)
+                if r >= l:
+                    r += 1
+            else:
+                r = lo + randbelow(cur_l)
+            if l > r:
+                l, r = r, l
+        col_l[i] = l
+        col_r[i] = r
+    return col_l, col_r
+
+
+def _as_int_bound(value: Any) -> int:
+    """
+    Convert an integral bound such as `5.0` to `int`, like `random.randint`
+    does, so that the generators only ever see ints.
+    """
+    ret = int(value)
+    if ret != value:
+        raise ValueError(f"bound {value!r} is not an integer")
+    return ret
+
+
+def _canonicalize_ranges(position_range: Sequence[Union[int, Tuple[int, int]]],
+                         mode: RangeQueryRandomMode) -> _Bounds:
+    """
+    Normalize every dimension of `position_range` into a `(lo, hi)` pair
+    and validate it against `mode`. The range length and the shortest big
+    query of each dimension are precomputed alongside it.
+    Raises:
+        ValueError: If the upper-bound is smaller than the lower-bound.
+        ValueError: If the mode is set to less but the upper-bound is equal to the lower-bound.
+        ValueError: If a bound is not an integral value.
+    """
+    less = mode == RangeQueryRandomMode.LESS
+    bounds: _Bounds = []
+    for pr in position_range:
+        if isinstance(pr, int):
+            lo, hi = 1, pr
+        elif len(pr) == 1:
+            lo, hi = 1, _as_int_bound(pr[0])
+        else:
+            lo, hi = _as_int_bound(pr[0]), _as_int_bound(pr[1])
+        if lo > hi:
+            raise ValueError("upper-bound should be larger than lower-bound")
+        if less and lo == hi:
+            raise ValueError(
+                "mode is set to less but upper-bound is equal to lower-bound")
+        cur_l = hi - lo + 1
+        bounds.append((lo, hi, cur_l, max(2 if less else 1, cur_l // 2)))
+    return bounds
+
+
+def _random_batch(num: int, bounds: _Bounds, mode: RangeQueryRandomMode,
+                  big_query: float):
+    """
+    Generate `num` unweighted queries one dimension at a time.
+    `bounds` must come from `_canonicalize_ranges`.
+    """
+    if not bounds:
+        return [([], [], ()) for _ in range(num)]
+
+    less = mode == RangeQueryRandomMode.LESS
+    columns_l: List[List[int]] = []
+    columns_r: List[List[int]] = []
+    for lo, _, cur_l, lb in bounds:
+        col_l, col_r = _random_endpoints(lo, cur_l, lb, num, less, big_query)
+        columns_l.append(col_l)
+        columns_r.append(col_r)
+    rows_l = map(list, zip(*columns_l))
+    rows_r = map(list, zip(*columns_r))
+    return list(zip(rows_l, rows_r, repeat(())))
+
+
+def _random_one(
+        bounds: _Bounds, mode: RangeQueryRandomMode, big_query: float,
+        weight_generator: Optional[Callable[[int, List[int], List[int]],
+                                            Any]], index: int):
+    """
+    Generate a single query `(query_l, query_r, w)`.
+    `bounds` must come from `_canonicalize_ranges`.
+    """
+    randint = random.randint
+    rand = random.random
+    query_l: List[int] = []
+    query_r: List[int] = []
+    for lo, hi, cur_l, lb in bounds:
+        if rand() < big_query:
+            # Generate a big query
+            ql = randint(lb, cur_l)
+            l = randint(lo, hi - ql + 1)
+            r = l + ql - 1
+        else:
+            l = randint(lo, hi)
+            if mode == RangeQueryRandomMode.LESS:
+                # Pick r uniformly among the other positions, which gives
+                # the same distribution as redrawing until l != r.
+                r = randint(lo, hi - 1)
+                if r >= l:
+                    r += 1
+            else:
+                r = randint(lo, hi)
+            if l > r:
+                l, r = r, l
+
+        query_l.append(l)
+        query_r.append(r)
+    if weight_generator is None:
+        return (query_l, query_r, ())
+    return (query_l, query_r, weight_generator(index, query_l, query_r))
+
+
 WeightT = TypeVar('WeightT', bound=Tuple[Any, ...])
 
 
 class RangeQuery(Generic[WeightT], Sequence[Tuple[List[int], List[int],
                                                   WeightT]]):
-    """A class for generating random queries."""
+    """
+    A class for generating random queries.
+
+    The queries are kept in `result` as a plain list of `(l, r, w)` tuples,
+    where `l` and `r` are lists of ints (one entry per dimension) and `w` is
+    the value returned by the weight generator, or `()` if there is none.
+    `result` is part of the public interface and may be modified directly.
+    """
+    __slots__ = ('result', )
     result: List[Tuple[List[int], List[int], WeightT]]  # Vector L, R, weights.
 
     def __init__(self):
@@ -64,16 +222,26 @@ class RangeQuery(Generic[WeightT], Sequence[Tuple[List[int], List[int],
         Return a string to output the queries. 
         The string contains all the queries with l and r (and w if generated) in a row, splits with "\\n".
         """
-        res = ''
+        buf = StringIO()
+        self.write_to(buf)
+        return buf.getvalue()[:-1]  # remove the last '\n'
+
+    def write_to(self, fp: TextIO):
+        """
+        Write the queries into the text file object `fp` row by row,
+        in the same format as `to_str`, each row followed by "\\n".
+        This avoids building the whole output string in memory first.
+        """
+        write = fp.write
+        fmt = ''
+        width = -1  # not a real width, so the first row always builds fmt
         for l, r, w in self.result:
-            l_to_str = [str(x) for x in l]
-            r_to_str = [str(x) for x in r]
-            w_to_str = [str(x) for x in w]
-            res += ' '.join(l_to_str) + ' ' + ' '.join(r_to_str)
-            if len(w_to_str) > 0:
-                res += ' ' + ' '.join(w_to_str)
-            res += '\n'
-        return res[:-1]  # remove the last '\n'
+            row = (*l, *r, *w)
+            # Rows almost always share one width, so the format is reused.
+            if len(row) != width:
+                width = len(row)
+                fmt = ' '.join(['%s'] * width) + '\n'
+            write(fmt % row)
 
     @staticmethod
     @overload
@@ -121,16 +289,22 @@ class RangeQuery(Generic[WeightT], Sequence[Tuple[List[int], List[int],
                 - Take the index of query (starting from 1), starting and ending positions as input.
                 - Return a list of weights of any length.
             big_query: a float number representing the probability for generating big queries.
+
+        All numbers are drawn sequentially from the `random` module, so calling
+        `random.seed` beforehand makes the generated queries reproducible.
         """
+        if position_range is None:
+            position_range = [10]
+
+        bounds = _canonicalize_ranges(position_range, mode)
         ret = RangeQuery()
+        if weight_generator is None:
+            ret.result = _random_batch(num, bounds, mode, big_query)
+            return ret
 
         for i in range(num):
             ret.result.append(
-                RangeQuery.get_one_query(position_range,
-                                         big_query=big_query,
-                                         mode=mode,
-                                         weight_generator=weight_generator,
-                                         index=i + 1))
+                _random_one(bounds, mode, big_query, weight_generator, i + 1))
         return ret
 
     @staticmethod
@@ -190,49 +364,5 @@ class RangeQuery(Generic[WeightT], Sequence[Tuple[List[int], List[int],
         if position_range is None:
             position_range = [10]
 
-        dimension = len(position_range)
-        query_l: List[int] = []
-        query_r: List[int] = []
-        for i in range(dimension):
-            cur_range: Tuple[int, int]
-            pr = position_range[i]
-            if isinstance(pr, int):
-                cur_range = (1, pr)
-            elif len(pr) == 1:
-                cur_range = (1, pr[0])
-            else:
-                cur_range = pr
-
-            if cur_range[0] > cur_range[1]:
-                raise ValueError(
-                    "upper-bound should be larger than lower-bound")
-            if mode == RangeQueryRandomMode.LESS and cur_range[0] == cur_range[
-                    1]:
-                raise ValueError(
-                    "mode is set to less but upper-bound is equal to lower-bound"
-                )
-
-            if random.random() < big_query:
-                # Generate a big query
-                cur_l = cur_range[1] - cur_range[0] + 1
-                lb = max(2 if mode == RangeQueryRandomMode.LESS else 1,
-                         cur_l // 2)
-                ql = random.randint(lb, cur_l)
-                l = random.randint(cur_range[0], cur_range[1] - ql + 1)
-                r = l + ql - 1
-            else:
-                l = random.randint(cur_range[0], cur_range[1])
-                r = random.randint(cur_range[0], cur_range[1])
-                # Expected complexity is O(1)
-                # We can use random.sample, But it's actually slower according to benchmarks.
-                while mode == RangeQueryRandomMode.LESS and l == r:
-                    l = random.randint(cur_range[0], cur_range[1])
-                    r = random.randint(cur_range[0], cur_range[1])
-                if l > r:
-                    l, r = r, l
-
-            query_l.append(l)
-            query_r.append(r)
-        if weight_generator is None:
-            return (query_l, query_r, ())
-        return (query_l, query_r, weight_generator(index, query_l, query_r))
+        return _random_one(_canonicalize_ranges(position_range, mode), mode,
+                           big_query, weight_generator, index)
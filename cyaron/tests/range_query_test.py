@@ -1,5 +1,6 @@
 import unittest
 import random
+from io import StringIO
 from cyaron.query import *
 from cyaron.vector import *
 
@@ -40,6 +41,8 @@ class TestRangeQuery(unittest.TestCase):
         limits = [(147, 154), (51, 220), (5, 4)]  # 5 > 4
         self.assertRaises(ValueError,
                           lambda: RangeQuery.random(TEST_LEN, limits))
+        # The limits are validated even if no query is generated.
+        self.assertRaises(ValueError, lambda: RangeQuery.random(0, limits))
 
     def test_allow_equal_v2_no_throw(self):
         limits = [(147, 154), (51, 220),
@@ -52,6 +55,22 @@ class TestRangeQuery(unittest.TestCase):
                             RangeQueryRandomMode.ALLOW_EQUAL, limits))
             self.assertTrue(qs[i][2] == ())
 
+    def test_integral_float_bounds(self):
+        limits = [(1.0, 5.0), (3.0, )]
+        for weight_gen in (None, lambda i, l, r: (i, )):
+            qs = RangeQuery.random(TEST_LEN,
+                                   limits,
+                                   weight_generator=weight_gen)
+            for l, r, _ in qs:
+                self.assertTrue(
+                    valid_query(l, r, RangeQueryRandomMode.ALLOW_EQUAL,
+                                limits))
+                self.assertTrue(all(type(x) is int for x in l + r))
+            self.assertRaises(
+                ValueError,
+                lambda: RangeQuery.random(TEST_LEN, [(1.5, 5)],
+                                          weight_generator=weight_gen))
+
     def test_less_v1(self):
         limits = [154, 220, 2]
         qs = RangeQuery.random(TEST_LEN,
@@ -97,21 +116,94 @@ class TestRangeQuery(unittest.TestCase):
 
     def test_weight(self):
 
-        def weight_gen(i, l, r):
-            ret = pow(114514, i, 19260817)
+        def mix(base, l, r):
             self.assertEqual(len(l), len(r))
             for j in range(len(l)):
-                ret = (ret + l[j] * r[j] * 3301) % 19260817
-            return ret
+                base = (base + l[j] * r[j] * 3301) % 19260817
+            return base
+
+        def weight_gen(i, l, r):
+            return mix(pow(114514, i, 19260817), l, r)
 
         limits = [(147, 154), (51, 220), (4, 5)]
         for i in range(len(limits)):
             if limits[i][0] > limits[i][1]:
                 limits[i] = limits[i][1], limits[i][0]
         qs = RangeQuery.random(TEST_LEN, limits, weight_generator=weight_gen)
-        i = 1
+        base = 1
         for l, r, w in qs.result:
+            # 114514^i mod p, advanced one step per query instead of pow().
+            base = base * 114514 % 19260817
             self.assertTrue(
                 valid_query(l, r, RangeQueryRandomMode.ALLOW_EQUAL, limits))
-            self.assertEqual(w, weight_gen(i, l, r))
-            i += 1
+            self.assertEqual(w, mix(base, l, r))
+
+    def test_to_str(self):
+        qs = RangeQuery()
+        self.assertEqual(str(qs), "")
+        qs.result = [([1, 2], [3, 4], ()), ([5, 6], [7, 8], ())]
+        self.assertEqual(str(qs), "1 2 3 4\n5 6 7 8")
+        qs.result = [([1], [2], (3, "w")), ([4], [5], ())]
+        self.assertEqual(qs.to_str(), "1 2 3 w\n4 5")
+        # Rows without any column print as empty lines.
+        qs.result = [([1], [2], ()), ([], [], ()), ([], [], ())]
+        self.assertEqual(qs.to_str(), "1 2\n\n")
+        self.assertEqual(RangeQuery.random(3, []).to_str(), "\n\n")
+        # Weights of rows without dimensions are not preceded by separators.
+        qs = RangeQuery.random(2, [], weight_generator=lambda i, l, r: (i, ))
+        self.assertEqual(qs.to_str(), "1\n2")
+
+        limits = [(147, 154), (51, 220), (4, 5)]
+        qs = RangeQuery.random(TEST_LEN, limits)
+        lines = qs.to_str().split("\n")
+        self.assertEqual(len(lines), TEST_LEN)
+        for line, (l, r, _) in zip(lines, qs.result):
+            self.assertEqual(line, " ".join(map(str, l + r)))
+
+    def test_write_to(self):
+        qs = RangeQuery()
+        qs.result = [([1], [2], ()), ([], [], ()), ([3, 4], [5, 6], (7, "w")),
+                     ([], [], ())]
+        buf = StringIO()
+        qs.write_to(buf)
+        self.assertEqual(buf.getvalue(), "1 2\n\n3 4 5 6 7 w\n\n")
+
+        qs = RangeQuery.random(TEST_LEN, [154, (51, 220), 2],
+                               weight_generator=lambda i, l, r: (i, ))
+        buf = StringIO()
+        qs.write_to(buf)
+        expected = "".join(" ".join(map(str, l + r + list(w))) + "\n"
+                           for l, r, w in qs.result)
+        self.assertEqual(buf.getvalue(), expected)
+
+        buf = StringIO()
+        RangeQuery.random(3, []).write_to(buf)
+        self.assertEqual(buf.getvalue(), "\n\n\n")
+        qs = RangeQuery.random(2, [], weight_generator=lambda i, l, r: (i, ))
+        buf = StringIO()
+        qs.write_to(buf)
+        self.assertEqual(buf.getvalue(), "1\n2\n")
+
+    def test_get_one_query(self):
+        for _ in range(TEST_LEN):
+            l, r, w = RangeQuery.get_one_query()
+            self.assertTrue(
+                valid_query(l, r, RangeQueryRandomMode.ALLOW_EQUAL, [10]))
+            self.assertEqual(w, ())
+
+        def weight_gen(i, l, r):
+            return (i, )
+
+        limits = [154, 220, 2]
+        for i in range(1, TEST_LEN + 1):
+            l, r, w = RangeQuery.get_one_query(limits,
+                                               mode=RangeQueryRandomMode.LESS,
+                                               weight_generator=weight_gen,
+                                               index=i)
+            self.assertTrue(
+                valid_query(l, r, RangeQueryRandomMode.LESS, limits))
+            self.assertEqual(w, (i, ))
+        self.assertRaises(
+            ValueError,
+            lambda: RangeQuery.get_one_query([154, 1],
+                                             mode=RangeQueryRandomMode.LESS))